@@ -1,182 +1,305 @@
-from playwright.sync_api import sync_playwright, TimeoutError
+from playwright.async_api import async_playwright, expect, TimeoutError
+import asyncio
 import json
+import logging
 import os
+import re
+import time
 from datetime import datetime
 
-def interact_with_all_dropdowns_and_capture_response():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context()
-        page = context.new_page()
+TARGET_URL = "https://bilgibankasi.ito.org.tr/tr/bilgi-bankasi/firma-bilgileri"
+MAX_CONCURRENT_CONTEXTS = 4  # Number of Kısım values scraped in parallel
+LISTBOX_SELECTOR = "ul.k-list[role='listbox']"
+DROPDOWN_SELECTOR = "span.k-dropdown-wrap"
+# Kısım, Bölüm, Grup and Sınıf; selecting any but the last loads the next one's items over AJAX
+LAST_DROPDOWN_INDEX = 3
+CASCADE_RESOURCE_TYPES = {"xhr", "fetch"}
+DISABLED_CLASS_RE = re.compile(r"\bk-state-disabled\b")
 
-        # Create output directories
-        output_dir = "scraping_results"
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Create log file
-        log_file = os.path.join(output_dir, f"search_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+# Adaptive delay between result pages: halved after fast responses, doubled after slow ones
+PAGE_WAIT_MIN_MS = 100
+PAGE_WAIT_MAX_MS = 2000
+PAGE_WAIT_INITIAL_MS = 200
+FAST_RESPONSE_MS = 500
 
+# Requests the scraper never reads. Stylesheets are kept because the Kendo
+# dropdown visibility checks depend on them.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net", "hotjar.com")
+
+# Search log; a FileHandler is attached for the duration of a scrape
+search_logger = logging.getLogger("ito_search")
+
+# Search form button and the results grid's "next page" pager link
+SEARCH_BUTTON_SELECTOR = "form label > button:visible"
+NEXT_PAGE_SELECTOR = ".k-pager-wrap a.k-pager-nav:visible"
+
+
+async def block_unneeded_requests(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def open_search_page(context):
+    """
+    Open a new page on the target site with the NACE code search form visible.
+    The page is closed again if it fails to load, since its context is reused.
+    """
+    page = await context.new_page()
+    try:
         # Go to the target page
-        page.goto("https://bilgibankasi.ito.org.tr/tr/bilgi-bankasi/firma-bilgileri")
-        page.wait_for_timeout(2000)
+        await page.goto(TARGET_URL)
+        await page.wait_for_load_state("networkidle")
 
         # Click the "Nace Kodu Seçimine Göre" button
-        page.click("span:has-text('Nace Kodu Seçimine Göre')")
-        page.wait_for_timeout(2000)
+        await page.click("span:has-text('Nace Kodu Seçimine Göre')")
+        await page.locator(DROPDOWN_SELECTOR).first.wait_for(state="visible")
+    except BaseException:
+        await page.close()
+        raise
+    return page
+
+
+async def get_dropdown_options(page, dropdown_index):
+    """
+    Open a dropdown once, read all of its option texts in one round-trip and close it again.
+    """
+    dropdown = page.locator(DROPDOWN_SELECTOR).nth(dropdown_index)
+    await dropdown.click()
+    options_list = page.locator(LISTBOX_SELECTOR).last
+    await options_list.wait_for(state="visible", timeout=5000)
+    texts = await options_list.locator("li").all_inner_texts()
+    await dropdown.click()
+    return dropdown, texts
+
+
+async def select_option_by_text(page, dropdown_index, text):
+    """
+    Open a dropdown and click the option with the given text.
+    Returns False (and closes the dropdown) if the option is not visible.
+    """
+    dropdown = page.locator(DROPDOWN_SELECTOR).nth(dropdown_index)
+    await dropdown.click()
+    options_list = page.locator(LISTBOX_SELECTOR).last
+    await options_list.wait_for(state="visible", timeout=5000)
+    option = options_list.get_by_text(text.strip(), exact=True).first
+    if not await option.is_visible():
+        await dropdown.click()
+        return False
+    if dropdown_index == LAST_DROPDOWN_INDEX:
+        await option.click()
+        return True
+
+    # Selecting an option fetches the next dropdown's items; wait for that response to
+    # finish loading and the next dropdown to be enabled before its items are read
+    async with page.expect_response(
+        lambda response: response.request.resource_type in CASCADE_RESOURCE_TYPES, timeout=30000
+    ) as resp_info:
+        await option.click()
+    await (await resp_info.value).finished()
+    next_dropdown = page.locator(DROPDOWN_SELECTOR).nth(dropdown_index + 1)
+    await expect(next_dropdown).not_to_have_class(DISABLED_CLASS_RE)
+    return True
+
+
+async def collect_all_pages_data(page):
+    all_data = []
+    page_num = 1
+
+    # Pager links are first, previous, next, last; resolved lazily on each use
+    next_link = page.locator(NEXT_PAGE_SELECTOR).nth(2)
+
+    wait_ms = PAGE_WAIT_INITIAL_MS
+
+    while True:
+        await page.wait_for_timeout(wait_ms)
+
+        try:
+            # Check before waiting on a response so the last page doesn't sit out the timeout
+            if "k-state-disabled" in (await next_link.get_attribute("class") or ""):
+                break
+
+            # The search response itself signals that the next page has loaded
+            started = time.monotonic()
+            async with page.expect_response("**/nace-code-select-search", timeout=30000) as resp_info:
+                await next_link.click()
+
+            response = await resp_info.value
+            page_data = await response.json()
+            all_data.append(page_data)
+            page_num += 1
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            if elapsed_ms < FAST_RESPONSE_MS:
+                wait_ms = max(PAGE_WAIT_MIN_MS, wait_ms // 2)
+            else:
+                wait_ms = min(PAGE_WAIT_MAX_MS, wait_ms * 2)
+
+        except TimeoutError:
+            break
+        except Exception:
+            break
+
+    return all_data, page_num
+
 
-        # Search button selector
-        search_button_selector = (
-            "xpath=/html/body/div[3]/div/div/div[2]/div/div/div/div/div/div/div/div/div[1]"
-            "/div/div[4]/div/div/div/div/div/form/div/div[2]/div/label/button"
+def safe_filename(text):
+    return text.strip().replace("/", "_").replace("\\", "_")
+
+
+async def search_and_save(page, kisim_file, kisim_text, bolum_text, grup_text, sinif_text):
+    """
+    Run the search for one dropdown combination, append it as one JSON line to the
+    Kısım's output file and log the outcome.
+    """
+    # One timestamp per combination, shared by the metadata and log entries
+    combo_timestamp = datetime.now().isoformat()
+    try:
+        # Get initial page data
+        async with page.expect_response("**/nace-code-select-search", timeout=30000) as resp_info:
+            await page.locator(SEARCH_BUTTON_SELECTOR).first.click()
+
+        initial_data = await (await resp_info.value).json()
+
+        # Get remaining pages
+        additional_data, total_pages = await collect_all_pages_data(page)
+
+        # Combine all data
+        all_data = [initial_data]
+        if additional_data:
+            all_data.extend(additional_data)
+
+        # Add metadata
+        final_data = {
+            "metadata": {
+                "kisim": kisim_text,
+                "bolum": bolum_text,
+                "grup": grup_text,
+                "sinif": sinif_text,
+                "timestamp": combo_timestamp,
+                "total_pages": len(all_data)
+            },
+            "pages": all_data
+        }
+
+        # Append JSON line
+        kisim_file.write(json.dumps(final_data, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+        # Log search combination and page count
+        log_entry = (
+            f"Timestamp: {combo_timestamp}\n"
+            f"Search Combination:\n"
+            f"  Kısım: {kisim_text}\n"
+            f"  Bölüm: {bolum_text}\n"
+            f"  Grup: {grup_text}\n"
+            f"  Sınıf: {sinif_text}\n"
+            f"Total Pages: {total_pages}\n"
+            f"Output File: {os.path.basename(kisim_file.name)}\n"
+            f"{'-' * 50}"
         )
+        search_logger.info(log_entry)
 
-        def get_dropdown_options(dropdown_index):
-            dropdown = page.locator("span.k-dropdown-wrap").nth(dropdown_index)
-            dropdown.click()
-            page.wait_for_timeout(500)
-            options_list = page.locator("ul.k-list[role='listbox']").last
-            options = options_list.locator("li")
-            count = options.count()
-            dropdown.click()
-            return dropdown, options, count
-
-        def select_option(dropdown, options, index):
-            dropdown.click()
-            page.wait_for_timeout(300)
-            option = options.nth(index)
-            if option.is_visible():
-                text = option.inner_text()
-                option.click()
-                page.wait_for_timeout(800)
-                return text
-            return None
-
-        def collect_all_pages_data():
-            all_data = []
-            page_num = 1
-            
-            while True:
-                page.wait_for_timeout(1000)
-                
-                try:
-                    with page.expect_response("**/nace-code-select-search", timeout=30000) as resp_info:
-                        next_button = page.locator("xpath=/html/body/div[3]/div/div/div[2]/div/div/div/div/div/div/div/div/div[2]/div/div/div/div/div[2]/div/div[3]/a[3]/span")
-                        parent = page.locator("xpath=/html/body/div[3]/div/div/div[2]/div/div/div/div/div/div/div/div/div[2]/div/div/div/div/div[2]/div/div[3]/a[3]")
-                        
-                        if "k-state-disabled" in (parent.get_attribute("class") or ""):
-                            break
-                            
-                        next_button.click()
-                    
-                    response = resp_info.value
-                    page_data = response.json()
-                    all_data.append(page_data)
-                    page_num += 1
-                    
-                except TimeoutError:
-                    break
-                except Exception:
-                    break
-            
-            return all_data, page_num
-
-        # Process all dropdown combinations
-        kisim_dropdown, kisim_options, kisim_count = get_dropdown_options(0)
-
-        for i in range(kisim_count):
-            kisim_dropdown, kisim_options, _ = get_dropdown_options(0)
-            kisim_text = select_option(kisim_dropdown, kisim_options, i)
-            if not kisim_text:
-                continue
-
-            bolum_dropdown, bolum_options, bolum_count = get_dropdown_options(1)
-            for j in range(bolum_count):
-                bolum_dropdown, bolum_options, _ = get_dropdown_options(1)
-                bolum_text = select_option(bolum_dropdown, bolum_options, j)
-                if not bolum_text:
+    except Exception as e:
+        # Log errors in the same file
+        error_entry = (
+            f"ERROR - Timestamp: {combo_timestamp}\n"
+            f"Failed combination:\n"
+            f"  Kısım: {kisim_text}\n"
+            f"  Bölüm: {bolum_text}\n"
+            f"  Grup: {grup_text}\n"
+            f"  Sınıf: {sinif_text}\n"
+            f"Error: {str(e)}\n"
+            f"{'-' * 50}"
+        )
+        search_logger.error(error_entry)
+
+
+async def scrape_kisim(context, kisim_text, output_dir):
+    """
+    Scrape every Bölüm/Grup/Sınıf combination under a single Kısım on its own page,
+    appending each combination to <output_dir>/<Kısım>.jsonl.
+    The lower levels share the page's dropdown state, so they are walked sequentially.
+    """
+    page = await open_search_page(context)
+    try:
+        with open(os.path.join(output_dir, f"{safe_filename(kisim_text)}.jsonl"), 'a', encoding='utf-8') as kisim_file:
+            if not await select_option_by_text(page, 0, kisim_text):
+                return
+
+            _, bolum_texts = await get_dropdown_options(page, 1)
+            for bolum_text in bolum_texts:
+                if not await select_option_by_text(page, 1, bolum_text):
                     continue
 
-                grup_dropdown, grup_options, grup_count = get_dropdown_options(2)
-                for k in range(grup_count):
-                    grup_dropdown, grup_options, _ = get_dropdown_options(2)
-                    grup_text = select_option(grup_dropdown, grup_options, k)
-                    if not grup_text:
+                _, grup_texts = await get_dropdown_options(page, 2)
+                for grup_text in grup_texts:
+                    if not await select_option_by_text(page, 2, grup_text):
                         continue
 
-                    sinif_dropdown, sinif_options, sinif_count = get_dropdown_options(3)
-                    for l in range(sinif_count):
-                        sinif_dropdown, sinif_options, _ = get_dropdown_options(3)
-                        sinif_text = select_option(sinif_dropdown, sinif_options, l)
-                        if not sinif_text:
+                    _, sinif_texts = await get_dropdown_options(page, 3)
+                    for sinif_text in sinif_texts:
+                        if not await select_option_by_text(page, 3, sinif_text):
                             continue
 
-                        try:
-                            # Get initial page data
-                            with page.expect_response("**/nace-code-select-search", timeout=30000) as resp_info:
-                                page.click(search_button_selector)
-                            
-                            initial_data = resp_info.value.json()
-                            
-                            # Get remaining pages
-                            additional_data, total_pages = collect_all_pages_data()
-                            
-                            # Combine all data
-                            all_data = [initial_data]
-                            if additional_data:
-                                all_data.extend(additional_data)
-                            
-                            # Add metadata
-                            final_data = {
-                                "metadata": {
-                                    "kisim": kisim_text,
-                                    "bolum": bolum_text,
-                                    "grup": grup_text,
-                                    "sinif": sinif_text,
-                                    "timestamp": datetime.now().isoformat(),
-                                    "total_pages": len(all_data)
-                                },
-                                "pages": all_data
-                            }
-                            
-                            # Save JSON data
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            filename = f"{output_dir}/data_{kisim_text}_{bolum_text}_{grup_text}_{sinif_text}_{timestamp}.json"
-                            filename = filename.replace("/", "_").replace("\\", "_")
-                            
-                            with open(filename, 'w', encoding='utf-8') as f:
-                                json.dump(final_data, f, ensure_ascii=False, indent=2)
-                            
-                            # Log search combination and page count
-                            with open(log_file, 'a', encoding='utf-8') as f:
-                                log_entry = (
-                                    f"Timestamp: {datetime.now().isoformat()}\n"
-                                    f"Search Combination:\n"
-                                    f"  Kısım: {kisim_text}\n"
-                                    f"  Bölüm: {bolum_text}\n"
-                                    f"  Grup: {grup_text}\n"
-                                    f"  Sınıf: {sinif_text}\n"
-                                    f"Total Pages: {total_pages}\n"
-                                    f"Output File: {os.path.basename(filename)}\n"
-                                    f"{'-' * 50}\n"
-                                )
-                                f.write(log_entry)
-                            
-                        except Exception as e:
-                            # Log errors in the same file
-                            with open(log_file, 'a', encoding='utf-8') as f:
-                                error_entry = (
-                                    f"ERROR - Timestamp: {datetime.now().isoformat()}\n"
-                                    f"Failed combination:\n"
-                                    f"  Kısım: {kisim_text}\n"
-                                    f"  Bölüm: {bolum_text}\n"
-                                    f"  Grup: {grup_text}\n"
-                                    f"  Sınıf: {sinif_text}\n"
-                                    f"Error: {str(e)}\n"
-                                    f"{'-' * 50}\n"
-                                )
-                                f.write(error_entry)
-
-        browser.close()
+                        await search_and_save(page, kisim_file, kisim_text, bolum_text, grup_text, sinif_text)
+    finally:
+        await page.close()
+
+
+async def interact_with_all_dropdowns_and_capture_response():
+    # Create output directories
+    output_dir = "scraping_results"
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Create log file
+    log_file = os.path.join(output_dir, f"search_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+    log_handler = logging.FileHandler(log_file, encoding='utf-8')
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    search_logger.addHandler(log_handler)
+    search_logger.setLevel(logging.INFO)
+    search_logger.propagate = False
+
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=False)
+
+            # Pool of browser contexts; each Kısım borrows one for the duration of its scrape
+            context_pool = asyncio.Queue()
+            for _ in range(MAX_CONCURRENT_CONTEXTS):
+                context = await browser.new_context()
+                await context.route("**/*", block_unneeded_requests)
+                context_pool.put_nowait(context)
+
+            # Read the Kısım options once
+            context = await context_pool.get()
+            page = await open_search_page(context)
+            _, kisim_texts = await get_dropdown_options(page, 0)
+            await page.close()
+            context_pool.put_nowait(context)
+
+            async def run_kisim(kisim_text):
+                context = await context_pool.get()
+                try:
+                    await scrape_kisim(context, kisim_text, output_dir)
+                except Exception as e:
+                    search_logger.error(
+                        f"ERROR - Timestamp: {datetime.now().isoformat()}\n"
+                        f"Failed Kısım: {kisim_text}\n"
+                        f"Error: {str(e)}\n"
+                        f"{'-' * 50}"
+                    )
+                finally:
+                    context_pool.put_nowait(context)
+
+            await asyncio.gather(*(run_kisim(kisim_text) for kisim_text in kisim_texts))
+
+            await browser.close()
+    finally:
+        search_logger.removeHandler(log_handler)
+        log_handler.close()
 
 if __name__ == "__main__":
-    interact_with_all_dropdowns_and_capture_response()
\ No newline at end of file
+    asyncio.run(interact_with_all_dropdowns_and_capture_response())
@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 import re
 import json
+import asyncio
 import pandas as pd
-import requests
+import httpx
 import anthropic
 import logging
+import os
 import sys
+import shelve
+import hashlib
+import argparse
 from datetime import datetime
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 import numpy as np
-from time import sleep
+import pyarrow as pa
 
 # Set up logging to display debug-level messages and force the configuration.
 logging.basicConfig(
@@ -21,37 +26,66 @@ logging.basicConfig(
     force=True
 )
 
+# Maximum number of months queried against the APIs at the same time.
+MAX_CONCURRENT_MONTHS = 4
+
 # -------------------------------
-# GEOCODING HELPER FUNCTION
+# GEOCODING HELPER FUNCTIONS
 # -------------------------------
-try:
-    from geopy.geocoders import Nominatim
-except ImportError:
-    Nominatim = None
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEOCODE_CACHE_FILE = "geocode_cache"
+EMPTY_GEOLOCATION = {"latitude": "", "longitude": ""}
+
+LocationKey = Tuple[str, str, str]  # (country, city, specific_location)
 
-def get_geolocation(country: str, city: str, specific_location: str = "") -> Dict[str, str]:
+async def _geocode_query(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, query: str) -> Optional[Dict[str, str]]:
     """
-    Given a country, city and optionally a more specific location, return a dictionary
-    with latitude and longitude. Uses Nominatim from geopy if available.
+    Geocode a single free-text query against Nominatim.
+    Returns None on request errors so the result is not cached.
     """
-    if not Nominatim:
-        logging.debug("Nominatim is not available. Skipping geolocation.")
-        return {"latitude": "", "longitude": ""}
-    
-    geolocator = Nominatim(user_agent="scam_center_dashboard")
-    query = ", ".join(filter(None, [specific_location, city, country]))
-    logging.debug("Geocoding query: %s", query)
-    try:
-        location = geolocator.geocode(query, timeout=10)
-        sleep(1)  # Respect Nominatim usage policies
-        if location:
-            logging.debug("Geo location found: %s, %s", location.latitude, location.longitude)
-            return {"latitude": str(location.latitude), "longitude": str(location.longitude)}
-        else:
+    async with semaphore:
+        logging.debug("Geocoding query: %s", query)
+        try:
+            response = await client.get(NOMINATIM_URL, params={"q": query, "format": "json", "limit": 1})
+            response.raise_for_status()
+            results = response.json()
+            if results:
+                logging.debug("Geo location found: %s, %s", results[0]["lat"], results[0]["lon"])
+                return {"latitude": str(results[0]["lat"]), "longitude": str(results[0]["lon"])}
             logging.debug("No geolocation found for query: %s", query)
-    except Exception as e:
-        logging.error("Error geocoding query '%s': %s", query, e)
-    return {"latitude": "", "longitude": ""}
+            return dict(EMPTY_GEOLOCATION)
+        except Exception as e:
+            logging.error("Error geocoding query '%s': %s", query, e)
+            return None
+        finally:
+            await asyncio.sleep(1)  # Respect Nominatim usage policies (1 request/second)
+
+async def gather_geocodes(locations: List[LocationKey]) -> Dict[LocationKey, Optional[Dict[str, str]]]:
+    """
+    Geocode unique (country, city, specific_location) triples, one request at a time.
+    """
+    semaphore = asyncio.Semaphore(1)
+    async with httpx.AsyncClient(headers={"User-Agent": "scam_center_dashboard"}, timeout=10.0) as client:
+        results = await asyncio.gather(*(
+            _geocode_query(client, semaphore, ", ".join(filter(None, [specific_location, city, country])))
+            for country, city, specific_location in locations
+        ))
+    return dict(zip(locations, results))
+
+def get_geolocations(locations: List[LocationKey]) -> Dict[LocationKey, Dict[str, str]]:
+    """
+    Given a list of (country, city, specific_location) triples, return a dictionary mapping
+    each triple to its latitude and longitude. Results are cached on disk so re-runs skip the network.
+    """
+    locations = [loc for loc in dict.fromkeys(locations) if any(loc)]
+    with shelve.open(GEOCODE_CACHE_FILE) as cache:
+        missing = [loc for loc in locations if json.dumps(loc) not in cache]
+        if missing:
+            logging.debug("Geocoding %d uncached locations.", len(missing))
+            for loc, geolocation in asyncio.run(gather_geocodes(missing)).items():
+                if geolocation is not None:
+                    cache[json.dumps(loc)] = geolocation
+        return {loc: cache.get(json.dumps(loc), EMPTY_GEOLOCATION) for loc in locations}
 
 # -------------------------------
 # DATA MODELS
@@ -92,14 +126,62 @@ class Config:
     def headers(self) -> Dict[str, str]:
         return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
 
+# -------------------------------
+# RESPONSE CACHE
+# -------------------------------
+CACHE_DIR = ".cache"
+
+def _cache_key(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_cached(cache_dir: Optional[str], key: str):
+    """
+    Return the cached value stored under `key` in `cache_dir`, or None if absent, unreadable
+    or caching is disabled.
+    """
+    if not cache_dir:
+        return None
+    path = os.path.join(cache_dir, key + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            value = json.load(f)
+        except json.JSONDecodeError:
+            # A truncated or corrupt entry is a miss; the fresh response overwrites it
+            logging.warning("Ignoring unreadable cache entry: %s", path)
+            return None
+    logging.debug("Cache hit: %s", path)
+    return value
+
+def store_cached(cache_dir: Optional[str], key: str, value) -> None:
+    if not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, key + ".json"), "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+
 # -------------------------------
 # PERPLEXITY API INTERACTION
 # -------------------------------
 class PerplexityClient:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, cache_dir: Optional[str] = None, refresh_cache: bool = False):
         self.config = config
+        self.cache_dir = cache_dir
+        # Skip cache reads but still store fresh responses
+        self.refresh_cache = refresh_cache
+        # One pooled client so every month reuses the same keep-alive connection.
+        # http2=True requires the optional "h2" package (pip install "httpx[http2]").
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            timeout=60.0
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
 
-    def query_articles(self, month_label: str) -> str:
+    async def query_articles(self, month_label: str) -> str:
         """
         Query Perplexity for scam center articles specifically for a given month of 2024.
         Returns the raw text response.
@@ -136,8 +218,12 @@ class PerplexityClient:
             "response_format": None
         }
         logging.debug("Perplexity payload: %s", json.dumps(payload, indent=2))
+        cache_key = _cache_key(payload)
+        cached = None if self.refresh_cache else load_cached(self.cache_dir, cache_key)
+        if cached is not None:
+            return cached
         try:
-            response = requests.post(
+            response = await self.client.post(
                 self.config.api_url,
                 json=payload,
                 headers=self.config.headers
@@ -150,6 +236,8 @@ class PerplexityClient:
                 # Adjust extraction if data structure differs
                 content = data["choices"][0]["message"]["content"]
                 logging.debug("Extracted content from Perplexity: %s", content)
+                if content:
+                    store_cached(self.cache_dir, cache_key, content)
                 return content
             else:
                 logging.error("Unexpected data format from Perplexity: %s", data)
@@ -160,10 +248,27 @@ class PerplexityClient:
 # -------------------------------
 # CLAUDE API INTERACTION WITH CITATIONS
 # -------------------------------
+# Opening code fence (with optional language tag); the closing fence is found with str.find
+CODE_FENCE_RE = re.compile(r"```(?:json)?\s*", re.IGNORECASE)
+TRAILING_COMMA_RE = re.compile(r",\s*(\]|\})")
+
 class ClaudeClient:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, cache_dir: Optional[str] = None, refresh_cache: bool = False):
         self.config = config
-        self.client = anthropic.Anthropic(api_key=config.api_key)
+        self.cache_dir = cache_dir
+        # Skip cache reads but still store fresh responses
+        self.refresh_cache = refresh_cache
+        self.client = anthropic.AsyncAnthropic(
+            api_key=config.api_key,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                timeout=600.0
+            )
+        )
+
+    async def aclose(self) -> None:
+        await self.client.close()
 
     @staticmethod
     def _extract_json(text: str) -> str:
@@ -171,8 +276,11 @@ class ClaudeClient:
         Extract JSON contained in triple-backtick code blocks (with optional language tag).
         If no code block is found, return the entire text.
         """
-        match = re.search(r"```(?:json)?\s*(.*?)\s*```", text, re.DOTALL)
-        return match.group(1).strip() if match else text.strip()
+        match = CODE_FENCE_RE.search(text)
+        if not match:
+            return text.strip()
+        end = text.find("```", match.end())
+        return text[match.end():end if end != -1 else None].strip()
 
     @staticmethod
     def _fix_json(json_str: str) -> str:
@@ -183,7 +291,7 @@ class ClaudeClient:
         json_end = json_str.rfind(']')
         if json_start != -1 and json_end != -1:
             json_str = json_str[json_start:json_end+1]
-        json_str = re.sub(r",\s*(\]|\})", r"\1", json_str)
+        json_str = TRAILING_COMMA_RE.sub(r"\1", json_str)
         if not json_str.strip().endswith(']'):
             json_str += ']'
         open_braces = json_str.count('{')
@@ -192,7 +300,7 @@ class ClaudeClient:
             json_str += '}' * (open_braces - close_braces)
         return json_str
 
-    def transform_data(self, perplexity_text: str) -> List[Dict]:
+    async def transform_data(self, perplexity_text: str) -> List[Dict]:
         """
         Use Claude (with citations enabled) to transform the Perplexity API output into our JSON schema.
         """
@@ -226,25 +334,34 @@ class ClaudeClient:
             "   - investigationStatus (string indicating status such as 'open', 'closed', or 'ongoing')\n"
             "   - dateScraped (the date when the data was scraped in YYYY-MM-DD format)\n"
             "   - geolocation (an object with fields: latitude and longitude; use null or empty string if not available)\n\n"
-            "Return the entire response as a valid JSON array enclosed in triple backticks with the language tag (i.e. ```json )."
+            "Return only the raw JSON array, starting with [ and ending with ]. Do not wrap it in code fences or add any other text."
         )
         combined_content = transformation_prompt + "\n\n" + "Perplexity API Output:\n" + perplexity_text
         logging.debug("Combined content sent to Claude:\n%s", combined_content)
+        cache_key = _cache_key([self.config.model, combined_content])
+        cached = None if self.refresh_cache else load_cached(self.cache_dir, cache_key)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.messages.create(
+            # Stream the response so text is accumulated as it arrives
+            async with self.client.messages.stream(
                 model=self.config.model,
                 max_tokens=8192,
                 messages=[{"role": "user", "content": combined_content}],
-            )
-            logging.debug("Claude API response (raw content): %s", response.content)
-            # Adjust extraction based on how the response content is structured:
-            content = response.content[0].text if response.content else ""
+            ) as stream:
+                content = await stream.get_final_text()
             logging.debug("Content extracted from Claude API: %s", content)
-            json_str = self._extract_json(content)
-            logging.debug("Extracted JSON string: %s", json_str)
-            fixed_json = self._fix_json(json_str)
-            logging.debug("Fixed JSON string: %s", fixed_json)
-            data = json.loads(fixed_json)
+            try:
+                # Fast path: Claude followed the instructions and returned a bare JSON array
+                data = json.loads(content)
+            except json.JSONDecodeError:
+                json_str = self._extract_json(content)
+                logging.debug("Extracted JSON string: %s", json_str)
+                fixed_json = self._fix_json(json_str)
+                logging.debug("Fixed JSON string: %s", fixed_json)
+                data = json.loads(fixed_json)
+            if data:
+                store_cached(self.cache_dir, cache_key, data)
             return data
         except Exception as e:
             logging.error("Error transforming data using Claude: %s", e)
@@ -253,6 +370,39 @@ class ClaudeClient:
 # -------------------------------
 # DATA PROCESSING & FLATTENING
 # -------------------------------
+# Maps nested Claude output paths (as produced by pd.json_normalize with sep="_")
+# to the flattened dashboard column names, in output order.
+FLATTENED_COLUMNS = {
+    "additionalInformation_incidentId": "incidentId",
+    "basicDetails_publishedAt": "publishedAt",
+    "basicDetails_source": "source",
+    "basicDetails_sourceUrl": "sourceUrl",
+    "basicDetails_incidentLocation_country": "incident_country",
+    "basicDetails_incidentLocation_city": "incident_city",
+    "basicDetails_incidentLocation_specific_location": "incident_specific_location",
+    "victimInformation_nationalities": "victim_nationalities",
+    "victimInformation_approximateNumberOfVictims": "approximateNumberOfVictims",
+    "victimInformation_demographicDetails": "demographicDetails",
+    "victimInformation_laborConditions": "laborConditions",
+    "perpetratorDetails_nationalityOfOperators": "operator_nationality",
+    "perpetratorDetails_organizationNames": "organizationNames",
+    "perpetratorDetails_numberOfPerpetrators": "numberOfPerpetrators",
+    "operationDetails_typesOfScams": "scam_types",
+    "operationDetails_duration": "duration",
+    "operationDetails_scale": "scale",
+    "lawEnforcementResponse_raidDetails": "raidDetails",
+    "lawEnforcementResponse_arrestsMade": "arrestsMade",
+    "lawEnforcementResponse_victimRescueOperations": "victimRescueOperations",
+    "additionalInformation_incidentDescription": "incidentDescription",
+    "additionalInformation_investigationStatus": "investigationStatus",
+    "additionalInformation_dateScraped": "dateScraped",
+    "additionalInformation_geolocation_latitude": "latitude",
+    "additionalInformation_geolocation_longitude": "longitude",
+}
+LIST_COLUMNS = ["victim_nationalities", "organizationNames", "scam_types"]
+NUMERIC_COLUMNS = ["approximateNumberOfVictims", "numberOfPerpetrators"]
+CATEGORY_COLUMNS = ["labor_type", "investigationStatus", "incident_country"]
+
 class ScamCenterAnalyzer:
     def __init__(self, df: pd.DataFrame):
         self.df = df
@@ -265,111 +415,81 @@ class ScamCenterAnalyzer:
             logging.debug("Received an empty DataFrame in process_data.")
             return self.df
 
+        # Build all converted columns first and apply them in a single assign
+        converted = {}
         if "publishedAt" in self.df.columns:
-            self.df["publishedAt"] = pd.to_datetime(self.df["publishedAt"], errors="coerce")
+            converted["publishedAt"] = pd.to_datetime(self.df["publishedAt"], errors="coerce")
         if "approximateNumberOfVictims" in self.df.columns:
-            self.df["approximateNumberOfVictims"] = pd.to_numeric(
+            converted["approximateNumberOfVictims"] = pd.to_numeric(
                 self.df["approximateNumberOfVictims"], errors="coerce"
-            ).fillna(0)
+            ).fillna(0).astype("int32")
         if "laborConditions" in self.df.columns:
-            self.df["labor_type"] = self.df["laborConditions"].apply(
-                lambda cond: cond.lower() if cond else "unknown"
+            converted["labor_type"] = (
+                self.df["laborConditions"].fillna("").astype(str).str.lower().replace("", "unknown")
             )
         else:
-            self.df["labor_type"] = "unknown"
+            converted["labor_type"] = "unknown"
+        self.df = self.df.assign(**converted)
         return self.df
 
     def flatten_data(self) -> pd.DataFrame:
         """
         Flatten nested dictionary fields into individual columns.
         """
-        flattened_rows = []
-        for _, row in self.df.iterrows():
-            # 1) Basic details
-            basic = row.get("basicDetails", {}) if isinstance(row.get("basicDetails"), dict) else {}
-            publishedAt = basic.get("publishedAt", "")
-            source = basic.get("source", "")
-            sourceUrl = basic.get("sourceUrl", "")
-            incidentLocation = basic.get("incidentLocation", {})
-            incident_country = incidentLocation.get("country", "")
-            incident_city = incidentLocation.get("city", "")
-            incident_specific_location = incidentLocation.get("specific_location", "")
-
-            # 2) Victim information
-            victim = row.get("victimInformation", {}) if isinstance(row.get("victimInformation"), dict) else {}
-            victim_nationalities = victim.get("nationalities", [])
-            approximateNumberOfVictims = victim.get("approximateNumberOfVictims", 0)
-            demographicDetails = victim.get("demographicDetails", "")
-            laborConditions = victim.get("laborConditions", "")
-
-            # 3) Perpetrator details
-            perp = row.get("perpetratorDetails", {}) if isinstance(row.get("perpetratorDetails"), dict) else {}
-            operator_nationality = perp.get("nationalityOfOperators", "")
-            organizationNames = perp.get("organizationNames", [])
-            numberOfPerpetrators = perp.get("numberOfPerpetrators", 0)
-
-            # 4) Operation details
-            oper = row.get("operationDetails", {}) if isinstance(row.get("operationDetails"), dict) else {}
-            scam_types = oper.get("typesOfScams", [])
-            duration = oper.get("duration", "")
-            scale = oper.get("scale", "")
-
-            # 5) Law enforcement response
-            law = row.get("lawEnforcementResponse", {}) if isinstance(row.get("lawEnforcementResponse"), dict) else {}
-            raidDetails = law.get("raidDetails", "")
-            arrestsMade = law.get("arrestsMade", "")
-            victimRescueOperations = law.get("victimRescueOperations", "")
-
-            # 6) Additional information
-            additional = row.get("additionalInformation", {}) if isinstance(row.get("additionalInformation"), dict) else {}
-            incidentId = additional.get("incidentId", "")
-            incidentDescription = additional.get("incidentDescription", "")
-            investigationStatus = additional.get("investigationStatus", "")
-            dateScraped = additional.get("dateScraped", "")
-            geolocation = additional.get("geolocation", {})
-            latitude = geolocation.get("latitude", "")
-            longitude = geolocation.get("longitude", "")
-
-            # Attempt geocoding if latitude/longitude is missing
-            if not latitude or not longitude:
-                generated_geo = get_geolocation(incident_country, incident_city, incident_specific_location)
-                latitude = generated_geo.get("latitude", "")
-                longitude = generated_geo.get("longitude", "")
-
-            labor_type = str(row.get("labor_type", "unknown"))
-            if "LaborType" in labor_type:
-                labor_type = labor_type.replace("LaborType.", "").lower()
-
-            flattened_rows.append({
-                "incidentId": incidentId,
-                "publishedAt": publishedAt,
-                "source": source,
-                "sourceUrl": sourceUrl,
-                "incident_country": incident_country,
-                "incident_city": incident_city,
-                "incident_specific_location": incident_specific_location,
-                "victim_nationalities": victim_nationalities,
-                "approximateNumberOfVictims": approximateNumberOfVictims,
-                "demographicDetails": demographicDetails,
-                "laborConditions": laborConditions,
-                "labor_type": labor_type,
-                "operator_nationality": operator_nationality,
-                "organizationNames": organizationNames,
-                "numberOfPerpetrators": numberOfPerpetrators,
-                "scam_types": scam_types,
-                "duration": duration,
-                "scale": scale,
-                "raidDetails": raidDetails,
-                "arrestsMade": arrestsMade,
-                "victimRescueOperations": victimRescueOperations,
-                "incidentDescription": incidentDescription,
-                "investigationStatus": investigationStatus,
-                "dateScraped": dateScraped,
-                "latitude": latitude,
-                "longitude": longitude
-            })
-
-        return pd.DataFrame(flattened_rows)
+        if self.df.empty:
+            return pd.DataFrame()
+
+        nested_df = pd.json_normalize(self.df.to_dict("records"), sep="_")
+        flat_df = nested_df.reindex(columns=list(FLATTENED_COLUMNS)).rename(columns=FLATTENED_COLUMNS)
+
+        # Fill missing values with the same defaults the schema uses
+        for col in LIST_COLUMNS:
+            flat_df[col] = flat_df[col].map(lambda value: value if isinstance(value, list) else [])
+        flat_df[NUMERIC_COLUMNS] = flat_df[NUMERIC_COLUMNS].fillna(0)
+        string_cols = flat_df.columns.difference(LIST_COLUMNS + NUMERIC_COLUMNS)
+        flat_df[string_cols] = flat_df[string_cols].fillna("")
+
+        labor_type = (
+            self.df["labor_type"] if "labor_type" in self.df.columns
+            else pd.Series("unknown", index=self.df.index)
+        ).astype(str)
+        is_enum = labor_type.str.contains("LaborType", regex=False)
+        labor_type = labor_type.where(~is_enum, labor_type.str.replace("LaborType.", "", regex=False).str.lower())
+        flat_df.insert(flat_df.columns.get_loc("laborConditions") + 1, "labor_type", labor_type.to_numpy())
+
+        return self._fill_missing_geolocations(flat_df)
+
+    @staticmethod
+    def _fill_missing_geolocations(flat_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Geocode each unique incident location lacking latitude/longitude once,
+        then join the results back onto every matching row.
+        """
+        if flat_df.empty:
+            return flat_df
+
+        location_cols = ["incident_country", "incident_city", "incident_specific_location"]
+        flat_df[location_cols] = flat_df[location_cols].fillna("").astype(str)
+        missing = (
+            flat_df["latitude"].fillna("").astype(str).eq("")
+            | flat_df["longitude"].fillna("").astype(str).eq("")
+        ).to_numpy()
+        if not missing.any():
+            return flat_df
+
+        locations = flat_df.loc[missing, location_cols].drop_duplicates()
+        geolocations = get_geolocations(list(locations.itertuples(index=False, name=None)))
+        if not geolocations:
+            return flat_df
+
+        geo_df = pd.DataFrame(
+            [(*loc, geo["latitude"], geo["longitude"]) for loc, geo in geolocations.items()],
+            columns=location_cols + ["geo_latitude", "geo_longitude"]
+        )
+        flat_df = flat_df.merge(geo_df, on=location_cols, how="left")
+        flat_df.loc[missing, "latitude"] = flat_df.loc[missing, "geo_latitude"].fillna("")
+        flat_df.loc[missing, "longitude"] = flat_df.loc[missing, "geo_longitude"].fillna("")
+        return flat_df.drop(columns=["geo_latitude", "geo_longitude"])
 
     def generate_summary_stats(self) -> Dict:
         if self.df.empty:
@@ -378,26 +498,75 @@ class ScamCenterAnalyzer:
         total_victims = int(self.df["approximateNumberOfVictims"].sum()) if "approximateNumberOfVictims" in self.df.columns else 0
         return {"total_incidents": total_incidents, "total_victims": total_victims}
 
-def convert_np_ints(obj):
-    if isinstance(obj, dict):
-        return {k: convert_np_ints(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_np_ints(item) for item in obj]
-    elif isinstance(obj, np.integer):
+def optimize_dtypes(dashboard_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast the flattened dashboard data to compact dtypes: int32 counts, categorical
+    low-cardinality strings and Arrow-backed string lists instead of Python list objects.
+    """
+    if dashboard_df.empty:
+        return dashboard_df
+    converted = {
+        col: pd.to_numeric(dashboard_df[col], errors="coerce").fillna(0).astype("int32")
+        for col in NUMERIC_COLUMNS
+    }
+    converted.update({col: dashboard_df[col].astype(str).astype("category") for col in CATEGORY_COLUMNS})
+    converted.update({
+        col: pd.array(
+            [[str(item) for item in values] for values in dashboard_df[col]],
+            dtype=pd.ArrowDtype(pa.list_(pa.string()))
+        )
+        for col in LIST_COLUMNS
+    })
+    return dashboard_df.assign(**converted)
+
+def save_dashboard_data(dashboard_df: pd.DataFrame, timestamp: str, output_format: str = "parquet") -> str:
+    """
+    Save the flattened dashboard data as zstd-compressed Parquet (default) or CSV.
+    Returns the output filename.
+    """
+    if output_format == "csv":
+        # Write list cells as Python list reprs (['A', 'B']), matching the earlier CSV output
+        csv_df = dashboard_df.assign(**{col: dashboard_df[col].map(lambda values: str(list(values))) for col in LIST_COLUMNS})
+        filename = f"clean_scam_center_data_{timestamp}.csv"
+        csv_df.to_csv(filename, index=False, encoding="utf-8")
+        return filename
+
+    # Arrow needs one type per column, so stringify scalar object columns that may mix str and numbers
+    object_cols = dashboard_df.select_dtypes(include="object").columns.difference(LIST_COLUMNS)
+    parquet_df = dashboard_df.assign(**{col: dashboard_df[col].astype(str) for col in object_cols})
+    # Parquet stores the lists as list<string> either way; writing them as plain object columns
+    # keeps the pyarrow-only ArrowDtype out of the pandas metadata so pd.read_parquet can read them
+    parquet_df = parquet_df.assign(**{col: parquet_df[col].astype(object) for col in LIST_COLUMNS})
+    filename = f"clean_scam_center_data_{timestamp}.parquet"
+    parquet_df.to_parquet(filename, engine="pyarrow", compression="zstd", index=False)
+    return filename
+
+def _np_default(obj):
+    """
+    json.dump fallback for numpy values; only called for objects json cannot serialize natively.
+    """
+    if isinstance(obj, np.integer):
         return int(obj)
-    else:
-        return obj
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 # -------------------------------
 # MAIN EXECUTION
 # -------------------------------
-def main():
+def main(use_cache: bool = True, output_format: str = "parquet"):
     """
     Main flow:
-      1. For each month of 2024, query data from Perplexity.
-      2. Transform the raw output using Claude.
+      1. For each month of 2024 (concurrently), query data from Perplexity.
+      2. Transform the raw output using Claude as soon as each month's query completes.
       3. Append to a master DataFrame.
       4. After all months are processed, finalize and save the cleaned data and summary statistics.
+
+    API responses are cached under CACHE_DIR so re-runs only hit the network for new queries;
+    pass use_cache=False (--no-cache) to re-query everything and overwrite the cached entries. Dashboard data is written as Parquet
+    unless output_format="csv" (--csv).
     """
     # Replace these tokens with your actual API keys.
     perplexity_api_key = ""
@@ -415,8 +584,12 @@ def main():
         api_url="https://api.anthropic.com/v1/messages"
     )
 
-    perplexity_client = PerplexityClient(perplexity_config)
-    claude_client = ClaudeClient(claude_config)
+    perplexity_client = PerplexityClient(
+        perplexity_config, cache_dir=os.path.join(CACHE_DIR, "perplexity"), refresh_cache=not use_cache
+    )
+    claude_client = ClaudeClient(
+        claude_config, cache_dir=os.path.join(CACHE_DIR, "claude"), refresh_cache=not use_cache
+    )
 
     # List of months for 2024
     months_2024 = [
@@ -425,28 +598,39 @@ def main():
         "September", "October", "November", "December"
     ]
 
-    # This will hold all data from each month
-    master_data = []
+    # Bound concurrent months to respect API rate limits
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_MONTHS)
 
-    # 1) Query + transform for each month
-    for month in months_2024:
-        logging.info(f"Processing data for {month} 2024...")
+    async def process_month(month: str) -> List[Dict]:
+        async with semaphore:
+            logging.info(f"Processing data for {month} 2024...")
 
-        # Step 1: Query Perplexity API for this month.
-        perplexity_raw = perplexity_client.query_articles(month + " 2024")
-        logging.debug("Number of tokens in perplexity output for %s 2024: %d", month, len(perplexity_raw.split()))
+            # Step 1: Query Perplexity API for this month.
+            perplexity_raw = await perplexity_client.query_articles(month + " 2024")
+            logging.debug("Number of tokens in perplexity output for %s 2024: %d", month, len(perplexity_raw.split()))
 
-        if not perplexity_raw:
-            logging.warning(f"No data retrieved for {month} 2024.")
-            continue
+            if not perplexity_raw:
+                logging.warning(f"No data retrieved for {month} 2024.")
+                return []
 
-        # Step 2: Transform data using Claude.
-        transformed_data = claude_client.transform_data(perplexity_raw)
-        if not transformed_data:
-            logging.warning(f"No transformable data for {month} 2024.")
-            continue
+            # Step 2: Transform data using Claude.
+            transformed_data = await claude_client.transform_data(perplexity_raw)
+            if not transformed_data:
+                logging.warning(f"No transformable data for {month} 2024.")
+                return []
 
-        # Append to our master list
+            return transformed_data
+
+    async def gather_months() -> List[List[Dict]]:
+        try:
+            return await asyncio.gather(*(process_month(m) for m in months_2024))
+        finally:
+            await perplexity_client.aclose()
+            await claude_client.aclose()
+
+    # 1) Query + transform all months concurrently, then merge in month order
+    master_data = []
+    for transformed_data in asyncio.run(gather_months()):
         master_data.extend(transformed_data)
 
     # Convert master data into a DataFrame
@@ -466,21 +650,25 @@ def main():
     if "dateScraped" in dashboard_df.columns:
         dashboard_df["dateScraped"] = dashboard_df["dateScraped"].replace("", datetime.now().strftime("%Y-%m-%d"))
 
+    dashboard_df = optimize_dtypes(dashboard_df)
+
     # 4) Generate summary stats and save results
     summary_stats = analyzer.generate_summary_stats()
-    summary_stats_modified = convert_np_ints(summary_stats)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_filename = f"clean_scam_center_data_{timestamp}.csv"
-    dashboard_df.to_csv(csv_filename, index=False, encoding="utf-8")
+    data_filename = save_dashboard_data(dashboard_df, timestamp, output_format)
 
     json_filename = f"dashboard_summary_{timestamp}.json"
     with open(json_filename, "w", encoding="utf-8") as f:
-        json.dump(summary_stats_modified, f, indent=2, ensure_ascii=False)
+        json.dump(summary_stats, f, indent=2, ensure_ascii=False, default=_np_default)
     
-    logging.info("Dashboard data saved to: %s", csv_filename)
+    logging.info("Dashboard data saved to: %s", data_filename)
     logging.info("Summary stats saved to: %s", json_filename)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate scam center dashboard data.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached API responses, re-query and refresh the cache.")
+    parser.add_argument("--csv", action="store_true", help="Write dashboard data as CSV instead of Parquet.")
+    args = parser.parse_args()
     print('hi')
-    main()
+    main(use_cache=not args.no_cache, output_format="csv" if args.csv else "parquet")
@@ -1,18 +1,47 @@
 import os
+import re
 import base64
-import json
+import binascii
+import functools
+import logging
+from logging.handlers import RotatingFileHandler
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html as lxml_html
+from urllib.parse import urljoin
 
 # === Configuration ===
 ZYTE_API_KEY = ""  # Replace with your API key
-auth_header = base64.b64encode(f"{ZYTE_API_KEY}:".encode()).decode()
+AUTH_HEADER = "Basic " + base64.b64encode(f"{ZYTE_API_KEY}:".encode()).decode()
+STATIC_HEADERS = {"Authorization": AUTH_HEADER, "Content-Type": "application/json"}
 ZYTE_API_URL = "https://api.zyte.com/v1/extract"
 
+# One session for the whole run so every Zyte call reuses the same keep-alive connection
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset(["POST"]),
+    raise_on_status=False,  # Hand the last 429/5xx back to the caller's status check
+)))
+SESSION.headers.update(STATIC_HEADERS)
+
 TARGET_URL = "https://www.resmigazete.gov.tr/03.09.2020"
 OUTPUT_DIR = "pdf_downloads"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+LOG_FILE = "scrape.log"
+LOG_EVERY_N_LINKS = 1000  # Log link progress once per this many links
+
+# Per-file messages go to a size-capped rotating log file rather than stdout
+logger = logging.getLogger(__name__)
+_log_handler = RotatingFileHandler(LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+_log_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+logger.addHandler(_log_handler)
+logger.setLevel(logging.INFO)
 
 def zyte_extract(url, browserHtml=False, screenshot=False, httpResponseBody=False):
     """
@@ -30,26 +59,108 @@ def zyte_extract(url, browserHtml=False, screenshot=False, httpResponseBody=Fals
     if httpResponseBody:
         payload["httpResponseBody"] = True
 
-    headers = {
-        "Authorization": f"Basic {auth_header}",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(ZYTE_API_URL, headers=headers, data=json.dumps(payload))
+    response = SESSION.post(ZYTE_API_URL, data=orjson.dumps(payload))
     if response.status_code == 200:
-        return response.json()
+        return orjson.loads(response.content)
     else:
-        print(f"Error fetching {url}:\nStatus Code: {response.status_code}\n{response.text}")
+        logger.error("Error fetching %s: status %d\n%s", url, response.status_code, response.text)
         return None
 
+def write_base64_to_file(b64_data, filename, chunk_size=64 * 1024):
+    """
+    Decode a base64 string into `filename` in fixed-size chunks, so the full
+    decoded binary is never held in memory at once.
+    `chunk_size` must be a multiple of 4 so every chunk decodes independently.
+    """
+    with open(filename, "wb") as f:
+        for start in range(0, len(b64_data), chunk_size):
+            f.write(base64.b64decode(b64_data[start:start + chunk_size]))
+
+# Start of the base64 string value of "httpResponseBody" in a raw Zyte response
+BODY_FIELD_RE = re.compile(rb'"httpResponseBody"\s*:\s*"')
+
+def stream_response_body_to_file(url, filename, chunk_size=64 * 1024):
+    """
+    Fetch `url` through Zyte with httpResponseBody and decode the base64 body
+    into `filename` while the response is still streaming, so neither the JSON
+    document nor the decoded file is ever held in memory whole.
+    The body is written to `filename`.part and only moved into place once it is
+    complete, so a failed download never leaves a truncated file behind.
+    Returns True if the full body was written.
+    """
+    payload = orjson.dumps({"url": url, "httpResponseBody": True})
+    with SESSION.post(ZYTE_API_URL, data=payload, stream=True) as response:
+        if response.status_code != 200:
+            logger.error("Error fetching %s: status %d\n%s", url, response.status_code, response.text)
+            return False
+
+        chunks = response.iter_content(chunk_size)
+
+        # Skip ahead to the opening quote of the base64 string, keeping a short
+        # tail in case the field name is split across two chunks
+        pending = b""
+        for chunk in chunks:
+            pending += chunk
+            match = BODY_FIELD_RE.search(pending)
+            if match:
+                pending = pending[match.end():]
+                break
+            pending = pending[-64:]
+        else:
+            return False
+
+        part_filename = filename + ".part"
+        complete = False
+        try:
+            with open(part_filename, "wb") as f:
+                for chunk in chunks:
+                    end = pending.find(b'"')
+                    if end != -1:
+                        break
+                    # Decode whole 4-character groups and carry the remainder over
+                    usable = len(pending) - len(pending) % 4
+                    f.write(binascii.a2b_base64(pending[:usable]))
+                    pending = pending[usable:] + chunk
+                else:
+                    end = pending.find(b'"')
+                    if end == -1:
+                        return False
+                f.write(binascii.a2b_base64(pending[:end]))
+            os.replace(part_filename, filename)
+            complete = True
+        finally:
+            if not complete and os.path.exists(part_filename):
+                os.remove(part_filename)
+    return True
+
+# Disk writes run on one background thread so the next Zyte request can start
+# while the previous file is still being written
+WRITE_POOL = ThreadPoolExecutor(max_workers=1)
+
+def save_in_background(b64_data, filename, saved_message, failed_message):
+    """
+    Queue a base64 payload to be decoded into `filename` on the write thread,
+    logging `saved_message` or `failed_message` (with the error) when done.
+    """
+    def write():
+        try:
+            write_base64_to_file(b64_data, filename)
+            logger.debug(saved_message)
+        except Exception as e:
+            logger.error("%s: %s", failed_message, e)
+    return WRITE_POOL.submit(write)
+
 def parse_links_from_html(html):
-    soup = BeautifulSoup(html, "html.parser")
-    links = [a.get("href") for a in soup.find_all("a", href=True)]
-    return links
+    return lxml_html.fromstring(html).xpath("//a/@href")
+
+# Optional scheme and authority, then the path up to any query string or fragment
+URL_PATH_RE = re.compile(r"^(?:[a-zA-Z][\w+.-]*:)?(?://[^/?#]*)?([^?#]*)")
 
+@functools.lru_cache(maxsize=4096)
 def sanitize_filename(url, default="download"):
-    parsed = urlparse(url)
-    filename = os.path.basename(parsed.path)
-    if not filename or filename in ["/", "#"]:
+    path = URL_PATH_RE.match(url).group(1)
+    filename = path.rpartition("/")[2]
+    if not filename:
         filename = default
     if not filename.lower().endswith(".pdf"):
         filename += ".pdf"
@@ -71,22 +182,19 @@ if extraction and "browserHtml" in extraction:
             continue
 
         normalized_url = urljoin(TARGET_URL, link)
-        print(f"[{idx}] Processing URL: {normalized_url}")
+        if idx % LOG_EVERY_N_LINKS == 0:
+            logger.info("[%d/%d] Processing URL: %s", idx, len(links), normalized_url)
         filename = os.path.join(OUTPUT_DIR, sanitize_filename(normalized_url, default=f"file_{idx}"))
         
-        # For PDF URLs, use Zyte to get the full binary content
+        # For PDF URLs, stream the full binary content from Zyte straight to disk
         if normalized_url.lower().endswith(".pdf"):
-            page_data = zyte_extract(normalized_url, httpResponseBody=True)
-            if page_data and "httpResponseBody" in page_data:
-                try:
-                    pdf_binary = base64.b64decode(page_data["httpResponseBody"])
-                    with open(filename, "wb") as f:
-                        f.write(pdf_binary)
-                    print(f"Saved full PDF to: {filename}")
-                except Exception as e:
-                    print(f"Failed to save PDF from {normalized_url}: {e}")
-            else:
-                print(f"No httpResponseBody returned for {normalized_url}")
+            try:
+                if stream_response_body_to_file(normalized_url, filename):
+                    logger.debug("Saved full PDF to: %s", filename)
+                else:
+                    logger.warning("No httpResponseBody returned for %s", normalized_url)
+            except Exception as e:
+                logger.error("Failed to save PDF from %s: %s", normalized_url, e)
         else:
             # For non-PDF URLs, you can decide whether to use a screenshot or other extraction.
             # For example, if you wanted a screenshot, you could do:
@@ -94,14 +202,15 @@ if extraction and "browserHtml" in extraction:
             if page_data and "screenshot" in page_data:
                 # Save the screenshot as a PNG file (change the extension if desired)
                 png_filename = filename.replace(".pdf", ".png")
-                try:
-                    image_data = base64.b64decode(page_data["screenshot"])
-                    with open(png_filename, "wb") as f:
-                        f.write(image_data)
-                    print(f"Saved screenshot to: {png_filename}")
-                except Exception as e:
-                    print(f"Failed to save screenshot for {normalized_url}: {e}")
+                save_in_background(
+                    page_data["screenshot"], png_filename,
+                    f"Saved screenshot to: {png_filename}",
+                    f"Failed to save screenshot for {normalized_url}",
+                )
             else:
-                print(f"No screenshot available for {normalized_url}")
+                logger.warning("No screenshot available for %s", normalized_url)
 else:
     print("Failed to fetch the main page using Zyte.")
+
+# Wait for any queued file writes to finish
+WRITE_POOL.shutdown(wait=True)
@@ -1,20 +1,39 @@
 import os
 import csv
-import json
+import orjson
+import operator
 import base64
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import httpx
+import itertools
+import logging
+from logging.handlers import RotatingFileHandler
 
 # -----------------------------
 # Configuration
 # -----------------------------
 ZYTE_API_KEY = ""
+ZYTE_API_URL = "https://api.zyte.com/v1/extract"
+# Basic Auth header and static request headers, encoded once at import
+AUTH_HEADER = "Basic " + base64.b64encode(f"{ZYTE_API_KEY}:".encode("utf-8")).decode("utf-8")
+STATIC_HEADERS = {"Content-Type": "application/json", "Authorization": AUTH_HEADER}
 
 TOTAL_PAGES_TO_FETCH = 63815      # Number of pages to fetch
 PAGE_SIZE = 10                    # Records per page
-CONCURRENT_REQUESTS = 5           # Number of threads for document downloads
+CONCURRENT_REQUESTS = 5           # Number of listing pages fetched concurrently
+MAX_IN_FLIGHT = CONCURRENT_REQUESTS * 4  # Cap on concurrent Zyte requests
+MAX_RETRIES = 3                   # Retries for 429/5xx responses from Zyte
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 CSV_FILE = "downloaded_docs.csv"
-PROGRESS_FILE = "progress.json"
+PROGRESS_FILE = "progress.json"      # Completed page numbers
+IDS_LOG_FILE = "progress.log"        # Append-only log of downloaded document IDs, one per line
+PROGRESS_SAVE_EVERY = 10             # Save the completed-pages file every N pages
+LOG_FILE = "scrape.log"
+LOG_EVERY_N_DOCS = 1000              # Log download progress once per this many documents
+
+logger = logging.getLogger(__name__)
+# Running count of downloaded documents, used to sample the progress log
+_doc_counter = itertools.count(1)
 
 # Columns to store in CSV (besides the downloaded text)
 CSV_COLUMNS = [
@@ -28,38 +47,68 @@ CSV_COLUMNS = [
     "index",
     "doc_text",  # We’ll store the downloaded text here
 ]
+# Pulls a row dict's values out in CSV_COLUMNS order (in C, unlike DictWriter)
+ROW_VALUES = operator.itemgetter(*CSV_COLUMNS)
+# Default value for every column missing from a record's metadata
+EMPTY_ROW = dict.fromkeys(CSV_COLUMNS, "")
+
+# Fixed part of every document request; download_document only adds the URL
+DOC_URL = "https://emsal.uyap.gov.tr/getDokuman?id={}"
+_DOC_PAYLOAD_TMPL = {
+    "httpRequestMethod": "GET",
+    "httpResponseBody": True,  # we want raw text
+    "customHttpRequestHeaders": [
+        {"name": "User-Agent", "value": "Mozilla/5.0"},
+    ],
+}
 
 # -----------------------------
 # Helper functions
 # -----------------------------
-def load_progress(filepath=PROGRESS_FILE):
+def load_progress(filepath=PROGRESS_FILE, ids_log_path=IDS_LOG_FILE):
     """
-    Load existing progress from a JSON file.
+    Load existing progress from the pages JSON file and the downloaded-IDs log.
     Returns a dict with keys:
       - pages_done: set of page numbers completed
       - ids_downloaded: set of document IDs completed
     """
-    if not os.path.exists(filepath):
-        return {"pages_done": set(), "ids_downloaded": set()}
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    # Convert lists back to sets
-    data["pages_done"] = set(data.get("pages_done", []))
-    data["ids_downloaded"] = set(data.get("ids_downloaded", []))
-    return data
+    progress = {"pages_done": set(), "ids_downloaded": set()}
+
+    legacy_ids = set()
+    if os.path.exists(filepath):
+        with open(filepath, "rb") as f:
+            data = orjson.loads(f.read())
+        # Convert lists back to sets
+        progress["pages_done"] = set(data.get("pages_done", []))
+        legacy_ids = set(data.get("ids_downloaded", []))
+
+    if os.path.exists(ids_log_path):
+        with open(ids_log_path, "r", encoding="utf-8") as f:
+            progress["ids_downloaded"].update(line.strip() for line in f if line.strip())
+
+    # Older progress files kept the downloaded IDs inline; move them into the log
+    # before the next save_progress drops them from the JSON file
+    missing_ids = legacy_ids - progress["ids_downloaded"]
+    if missing_ids:
+        with open(ids_log_path, "a", encoding="utf-8") as f:
+            f.writelines(doc_id + "\n" for doc_id in missing_ids)
+        progress["ids_downloaded"].update(missing_ids)
+    return progress
 
 def save_progress(progress, filepath=PROGRESS_FILE):
     """
-    Save progress to a JSON file.
-    Convert sets to lists for JSON serialization.
+    Save the completed pages to a JSON file.
+    Downloaded IDs are not rewritten here; they are appended to IDS_LOG_FILE as they complete.
+    The file is written to a temporary path and renamed over the old one, so a crash
+    mid-write never leaves a truncated progress file.
     """
     data = {
         "pages_done": list(progress["pages_done"]),
-        "ids_downloaded": list(progress["ids_downloaded"]),
     }
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(data))
+    os.replace(tmp_path, filepath)
 
 def init_csv_file(csv_path=CSV_FILE, columns=CSV_COLUMNS):
     """
@@ -71,58 +120,75 @@ def init_csv_file(csv_path=CSV_FILE, columns=CSV_COLUMNS):
             writer = csv.DictWriter(f, fieldnames=columns, quoting=csv.QUOTE_ALL)
             writer.writeheader()
 
-def append_row_to_csv(row_data, csv_path=CSV_FILE, columns=CSV_COLUMNS):
+def checkpoint(csv_fh, ids_fh, new_ids, pages_done, force=False):
     """
-    Appends a single row of data to the CSV file.
-    row_data is a dictionary with keys matching columns.
+    Flush buffered CSV rows, then append the newly downloaded IDs to the log,
+    so progress never records documents whose rows could be lost if the process dies.
+    The completed pages are saved every PROGRESS_SAVE_EVERY pages (or when forced),
+    after fsyncing both files so the saved progress also survives an OS crash;
+    pages lost to a crash are re-listed, but their documents are skipped via the ID log.
     """
-    with open(csv_path, mode="a", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=columns, quoting=csv.QUOTE_ALL)
-        writer.writerow(row_data)
+    csv_fh.flush()
+    if new_ids:
+        ids_fh.writelines(doc_id + "\n" for doc_id in new_ids)
+        ids_fh.flush()
+    if force or len(pages_done) % PROGRESS_SAVE_EVERY == 0:
+        os.fsync(csv_fh.fileno())
+        os.fsync(ids_fh.fileno())
+        save_progress({"pages_done": pages_done}, PROGRESS_FILE)
 
 
 # -----------------------------
 # Zyte Helper
 # -----------------------------
-def zyte_request(payload):
+# Limits concurrent Zyte requests; HTTP/2 multiplexes them over few connections,
+# so the connection limits alone would not cap in-flight requests.
+_request_semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+def create_client():
+    """
+    Create the shared HTTP/2 client used for every Zyte request.
+    http2=True requires the optional "h2" package (pip install "httpx[http2]").
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=60.0,
+        headers=STATIC_HEADERS,
+    )
+
+async def zyte_request(client, payload):
     """
     Generic helper to send a POST to Zyte’s /v1/extract endpoint using Basic Auth.
     `payload` is a dict describing the extraction request (url, httpRequestMethod, etc.).
     Returns the JSON-decoded response from Zyte.
 
     If 'httpResponseBody' is True, we decode the resulting base64 body from
-    'httpResponseBody' in the response and return it as response["decodedBody"] for convenience.
+    'httpResponseBody' in the response and return the raw bytes as response["decodedBodyBytes"].
     """
-    # 1) Prepare headers with Basic Auth
-    auth_string = f"{ZYTE_API_KEY}:".encode("utf-8")
-    auth_token = base64.b64encode(auth_string).decode("utf-8")
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Basic {auth_token}",
-    }
-
-    # 2) Make the request
-    resp = requests.post("https://api.zyte.com/v1/extract", headers=headers, json=payload)
+    # 1) Make the request, retrying rate-limit and server errors with exponential backoff
+    async with _request_semaphore:
+        for attempt in range(MAX_RETRIES + 1):
+            resp = await client.post(ZYTE_API_URL, content=orjson.dumps(payload))
+            if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            await asyncio.sleep(2 ** attempt)
     resp.raise_for_status()
 
-    # 3) Parse JSON
-    data = resp.json()
+    # 2) Parse JSON
+    data = orjson.loads(resp.content)
 
-    # 4) If the user asked for httpResponseBody, decode it from base64
+    # 3) If the user asked for httpResponseBody, decode it from base64.
+    # Keep the bytes; callers that need text decode them, JSON parsers take bytes directly.
     if payload.get("httpResponseBody") and "httpResponseBody" in data:
-        raw_b64 = data["httpResponseBody"]
-        if raw_b64:
-            decoded = base64.b64decode(raw_b64).decode("utf-8", errors="replace")
-        else:
-            decoded = ""
+        raw_b64 = data.pop("httpResponseBody")
         # Store as an extra key for convenience
-        data["decodedBody"] = decoded
+        data["decodedBodyBytes"] = base64.b64decode(raw_b64) if raw_b64 else b""
 
     return data
 
 
-def post_aramadetaylist(page_number=1, page_size=10):
+async def post_aramadetaylist(client, page_number=1, page_size=10):
     """
     Makes the POST request to get a page of data (document IDs & metadata)
     using Zyte’s /v1/extract for a POST-based extraction.
@@ -170,41 +236,36 @@ def post_aramadetaylist(page_number=1, page_size=10):
             {"name": "X-Requested-With", "value": "XMLHttpRequest"},
         ],
         # The POST body: pass as either httpRequestText (UTF-8) or httpRequestBody (base64).
-        "httpRequestText": json.dumps(original_site_payload),
+        "httpRequestText": orjson.dumps(original_site_payload).decode("utf-8"),
     }
 
     # Send request via Zyte
-    data = zyte_request(zyte_payload)
+    data = await zyte_request(client, zyte_payload)
 
-    # The original site returns JSON in the body. So parse the "decodedBody" as JSON:
-    raw_body = data.get("decodedBody", "")
+    # The original site returns JSON in the body. So parse the decoded bytes as JSON:
+    raw_body = data.get("decodedBodyBytes", b"")
     try:
-        parsed_json = json.loads(raw_body)
+        parsed_json = orjson.loads(raw_body)
         return parsed_json  # We'll return the parsed response from the site
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         # If there's an error decoding the JSON, raise or handle it
         raise RuntimeError(f"Could not parse JSON from page {page_number}: {e}")
 
 
-def download_document(doc_id):
+async def download_document(client, doc_id):
     """
     Downloads the document text for the given doc_id via Zyte,
     returning the decoded text content.
     """
     # The site requires a GET to https://emsal.uyap.gov.tr/getDokuman?id={doc_id}
-    zyte_payload = {
-        "url": f"https://emsal.uyap.gov.tr/getDokuman?id={doc_id}",
-        "httpRequestMethod": "GET",
-        "httpResponseBody": True,  # we want raw text
-        "customHttpRequestHeaders": [
-            {"name": "User-Agent", "value": "Mozilla/5.0"},
-        ],
-    }
+    zyte_payload = {**_DOC_PAYLOAD_TMPL, "url": DOC_URL.format(doc_id)}
 
-    data = zyte_request(zyte_payload)
-    # data["decodedBody"] is the raw text we want
-    doc_text = data.get("decodedBody", "")
-    print(f"[download_document] doc_id={doc_id}, length={len(doc_text)} chars")
+    data = await zyte_request(client, zyte_payload)
+    # data["decodedBodyBytes"] holds the raw document; decode it to text here
+    doc_text = data.get("decodedBodyBytes", b"").decode("utf-8", errors="replace")
+    doc_count = next(_doc_counter)
+    if doc_count % LOG_EVERY_N_DOCS == 0:
+        logger.info("Downloaded %d documents (latest doc_id=%s, %d chars)", doc_count, doc_id, len(doc_text))
 
     return doc_text
 
@@ -212,7 +273,72 @@ def download_document(doc_id):
 # -----------------------------
 # Main script logic
 # -----------------------------
-def main():
+async def process_page(client, page_number, data, csv_fh, writer, ids_fh, pages_done, ids_downloaded):
+    """
+    Download every not-yet-downloaded document listed on one page concurrently,
+    append them to the CSV and mark the page as done.
+    """
+    # The JSON structure is expected as in your original code:
+    # data["data"]["data"] is a list of records with keys like "id", "daire", etc.
+    # Adjust if the structure has changed.
+    records = data.get("data", {}).get("data", [])
+
+    if not records:
+        logger.warning("No records found on page %d.", page_number)
+        # Still mark the page as done to avoid re-checking
+        pages_done.add(page_number)
+        checkpoint(csv_fh, ids_fh, [], pages_done)
+        return
+
+    logger.debug("Page %d returned %d records.", page_number, len(records))
+
+    # 4. Download documents (concurrently) only for IDs not yet downloaded
+    metadata_by_id = {}
+    for r in records:
+        doc_id = str(r.get("id", ""))
+        if doc_id:
+            metadata_by_id[doc_id] = r
+
+    doc_ids = [doc_id for doc_id in metadata_by_id if doc_id not in ids_downloaded]
+    # Reserve the IDs before awaiting so other pages in the batch don't download them too;
+    # failed downloads are released again below
+    ids_downloaded.update(doc_ids)
+    results = await asyncio.gather(
+        *(download_document(client, doc_id) for doc_id in doc_ids),
+        return_exceptions=True,
+    )
+
+    rows = []
+    for doc_id, doc_text in zip(doc_ids, results):
+        if isinstance(doc_text, Exception):
+            logger.error("Error downloading doc_id %s: %s", doc_id, doc_text)
+            ids_downloaded.discard(doc_id)
+            continue
+
+        # 5. Prepare the row for CSV: defaults, then the record's metadata, then id and text
+        rows.append({**EMPTY_ROW, **metadata_by_id[doc_id], "id": doc_id, "doc_text": doc_text})
+
+    # 6. Append the page's rows to the CSV in one batch
+    writer.writerows(map(ROW_VALUES, rows))
+
+    # Mark the page as completed
+    pages_done.add(page_number)
+    checkpoint(csv_fh, ids_fh, [row["id"] for row in rows], pages_done)
+    logger.debug("Finished page %d.", page_number)
+
+
+def fetch_listings(client, page_numbers):
+    """
+    Start fetching the listing pages concurrently and return a future of their results
+    (or exceptions), in page order. The requests begin immediately.
+    """
+    return asyncio.gather(
+        *(post_aramadetaylist(client, page_number=p, page_size=PAGE_SIZE) for p in page_numbers),
+        return_exceptions=True,
+    )
+
+
+async def main():
     # 1. Load or create the progress data
     progress = load_progress(PROGRESS_FILE)
     pages_done = progress["pages_done"]
@@ -221,81 +347,58 @@ def main():
     # 2. Initialize the CSV file (write header if not exists)
     init_csv_file(CSV_FILE, CSV_COLUMNS)
 
-    # 3. Iterate over the pages
-    for page_number in range(1, TOTAL_PAGES_TO_FETCH + 1):
-        if page_number in pages_done:
-            print(f"Page {page_number} already processed; skipping.")
-            continue
-
-        print(f"\n=== Fetching page {page_number} ===")
-        try:
-            data = post_aramadetaylist(page_number=page_number, page_size=PAGE_SIZE)
-        except Exception as e:
-            print(f"Error fetching page {page_number}: {e}")
-            continue
+    # 3. Iterate over the pages, fetching CONCURRENT_REQUESTS listing pages at a time
+    pages_to_fetch = [p for p in range(1, TOTAL_PAGES_TO_FETCH + 1) if p not in pages_done]
+    if len(pages_to_fetch) < TOTAL_PAGES_TO_FETCH:
+        print(f"{TOTAL_PAGES_TO_FETCH - len(pages_to_fetch)} pages already processed; skipping.")
+
+    batches = [
+        pages_to_fetch[start:start + CONCURRENT_REQUESTS]
+        for start in range(0, len(pages_to_fetch), CONCURRENT_REQUESTS)
+    ]
+
+    # Keep the CSV open for the whole run; rows are buffered and synced at each checkpoint
+    with open(CSV_FILE, mode="a", encoding="utf-8", newline="", buffering=1 << 20) as csv_fh, \
+            open(IDS_LOG_FILE, mode="a", encoding="utf-8", buffering=1 << 16) as ids_fh:
+        writer = csv.writer(csv_fh, quoting=csv.QUOTE_ALL)
+
+        async with create_client() as client:
+            # The next batch's listing requests run while the current batch's documents download
+            next_listings = fetch_listings(client, batches[0]) if batches else None
+            for i, batch in enumerate(batches):
+                logger.info("Fetching pages %d-%d", batch[0], batch[-1])
+                listings = await next_listings
+                if i + 1 < len(batches):
+                    next_listings = fetch_listings(client, batches[i + 1])
+
+                # Download every page's documents in the batch at once, multiplexed over the
+                # shared HTTP/2 connection (Zyte's /v1/extract takes one URL per request)
+                page_tasks = []
+                for page_number, data in zip(batch, listings):
+                    if isinstance(data, Exception):
+                        logger.error("Error fetching page %d: %s", page_number, data)
+                        continue
+                    page_tasks.append(
+                        process_page(client, page_number, data, csv_fh, writer, ids_fh, pages_done, ids_downloaded)
+                    )
+                await asyncio.gather(*page_tasks)
+
+            checkpoint(csv_fh, ids_fh, [], pages_done, force=True)
 
-        # The JSON structure is expected as in your original code:
-        # data["data"]["data"] is a list of records with keys like "id", "daire", etc.
-        # Adjust if the structure has changed.
-        records = data.get("data", {}).get("data", [])
+    print("\nAll requested pages have been processed!")
 
-        if not records:
-            print(f"No records found on page {page_number}.")
-            # Still mark the page as done to avoid re-checking
-            pages_done.add(page_number)
-            save_progress({"pages_done": pages_done, "ids_downloaded": ids_downloaded}, PROGRESS_FILE)
-            continue
 
-        print(f"Page {page_number} returned {len(records)} records.")
-
-        # 4. Download documents (concurrently) only for IDs not yet downloaded
-        metadata_by_id = {}
-        for r in records:
-            doc_id = str(r.get("id", ""))
-            if doc_id:
-                metadata_by_id[doc_id] = r
-
-        futures = {}
-        with ThreadPoolExecutor(max_workers=CONCURRENT_REQUESTS) as executor:
-            for doc_id, record in metadata_by_id.items():
-                if doc_id not in ids_downloaded:
-                    future = executor.submit(download_document, doc_id)
-                    futures[future] = doc_id
-
-            # Collect results
-            for future in as_completed(futures):
-                doc_id = futures[future]
-                try:
-                    doc_text = future.result()
-                except Exception as e:
-                    print(f"Error downloading doc_id {doc_id}: {e}")
-                    continue
-
-                # 5. Prepare the row for CSV
-                row = {}
-                row["id"] = doc_id
-                row["daire"] = metadata_by_id[doc_id].get("daire", "")
-                row["esasNo"] = metadata_by_id[doc_id].get("esasNo", "")
-                row["kararNo"] = metadata_by_id[doc_id].get("kararNo", "")
-                row["kararTarihi"] = metadata_by_id[doc_id].get("kararTarihi", "")
-                row["arananKelime"] = metadata_by_id[doc_id].get("arananKelime", "")
-                row["durum"] = metadata_by_id[doc_id].get("durum", "")
-                row["index"] = metadata_by_id[doc_id].get("index", "")
-                row["doc_text"] = doc_text
-
-                # 6. Append row to CSV
-                append_row_to_csv(row, CSV_FILE, CSV_COLUMNS)
-
-                # Mark doc_id as downloaded
-                ids_downloaded.add(doc_id)
-
-        # Mark the page as completed
-        pages_done.add(page_number)
-        save_progress({"pages_done": pages_done, "ids_downloaded": ids_downloaded}, PROGRESS_FILE)
-        print(f"Finished page {page_number}, progress saved.")
-
-    print("\nAll requested pages have been processed!")
+def configure_logging(log_file=LOG_FILE):
+    """
+    Send log records to a size-capped rotating file instead of stdout.
+    """
+    handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
 
 
 if __name__ == "__main__":
-    main()
+    configure_logging()
+    asyncio.run(main())
@@ -1,12 +1,12 @@
-import requests
-import json
+import base64
+import httpx
+import orjson
 import time
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 import csv
 from pathlib import Path
 import logging
 import concurrent.futures
-import queue
 import threading
 
 # Set up logging
@@ -16,9 +16,14 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Upper bound on a server-requested Retry-After wait, in seconds
+MAX_RETRY_AFTER = 60
+
 class CompanyScraper:
     def __init__(self, max_workers=3):
         self.zyte_api_key = "Replace with a Zyte API key"
+        # Encode the Basic Auth header once instead of letting requests rebuild it per call
+        self.auth_header = "Basic " + base64.b64encode(f"{self.zyte_api_key}:".encode()).decode()
         self.base_url = "https://www.zaubacorp.com/company-list/p-{}-company.html"
         self.companies_file = "companies.csv"
         self.progress_file = "progress.txt"
@@ -26,8 +31,22 @@ class CompanyScraper:
         self.companies_found = 0
         self.current_page = self.load_progress()
         self.max_workers = max_workers
-        self.results_queue = queue.Queue()
         self.csv_lock = threading.Lock()
+        # Keep the CSV open for the scraper's lifetime instead of reopening it per batch
+        is_new_file = not Path(self.companies_file).exists()
+        self._csv_fh = open(self.companies_file, 'a', newline='', encoding='utf-8', buffering=1 << 20)
+        self._csv_writer = csv.writer(self._csv_fh)
+        if is_new_file:
+            self._csv_writer.writerow(['CIN', 'Company Name'])
+            self._csv_fh.flush()  # So count_existing_companies sees the header
+        # One client shared by all worker threads; HTTP/2 multiplexes their requests
+        # over a single connection (http2=True requires the optional "h2" package)
+        self.client = httpx.Client(
+            http2=True,
+            timeout=30,
+            headers={"Authorization": self.auth_header},
+            limits=httpx.Limits(max_connections=max_workers * 2, max_keepalive_connections=max_workers),
+        )
 
     def load_progress(self):
         try:
@@ -52,35 +71,45 @@ class CompanyScraper:
 
         for attempt in range(3):  # Maximum 3 retries
             try:
-                response = requests.post(
+                response = self.client.post(
                     "https://api.zyte.com/v1/extract",
-                    auth=(self.zyte_api_key, ""),
                     json={
                         "url": url,
                         "browserHtml": True,
                     },
-                    timeout=30
                 )
 
+                if response.status_code == 429:
+                    # Rate limited: wait as long as the server asks (capped), else fall back to backoff
+                    if attempt == 2:  # Don't sleep on last attempt
+                        logging.warning(f"Rate limited on page {page_number}; giving up")
+                        break
+                    retry_after = response.headers.get("Retry-After", "")
+                    delay = min(int(retry_after), MAX_RETRY_AFTER) if retry_after.isdigit() else 2 ** attempt
+                    logging.warning(f"Rate limited on page {page_number}; retrying in {delay}s")
+                    time.sleep(delay)
+                    continue
+
                 if response.status_code != 200:
                     logging.error(f"Error fetching page {page_number}: {response.text}")
                     time.sleep(2 ** attempt)  # Exponential backoff
                     continue
 
-                html_content = response.json()["browserHtml"]
-                soup = BeautifulSoup(html_content, 'lxml')  # Using lxml parser for better performance
+                html_content = orjson.loads(response.content)["browserHtml"]
+                tree = lxml_html.fromstring(html_content)  # Parse directly with lxml, no BeautifulSoup tree
 
                 companies = []
-                table = soup.find('table', {'id': 'table'})
-                if not table:
+                tables = tree.xpath('//table[@id="table"]')
+                if not tables:
                     logging.error(f"No table found on page {page_number}")
                     return None
 
-                for row in table.find_all('tr')[1:]:
-                    cols = row.find_all('td')
+                for row in tables[0].xpath('.//tr')[1:]:
+                    cols = row.xpath('.//td')
                     if len(cols) >= 2:
-                        cin = cols[0].text.strip()
-                        company_name = cols[1].find('a').text.strip() if cols[1].find('a') else cols[1].text.strip()
+                        cin = cols[0].text_content().strip()
+                        links = cols[1].xpath('.//a')
+                        company_name = (links[0] if links else cols[1]).text_content().strip()
                         companies.append((cin, company_name))
 
                 return companies
@@ -97,58 +126,41 @@ class CompanyScraper:
             return
 
         with self.csv_lock:
-            mode = 'a' if Path(self.companies_file).exists() else 'w'
-            with open(self.companies_file, mode, newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                if mode == 'w':
-                    writer.writerow(['CIN', 'Company Name'])
-                writer.writerows(companies)
-
-    def process_page_range(self, start_page, end_page):
-        for page in range(start_page, end_page + 1):
-            companies = self.scrape_page(page)
-            if companies:
-                self.results_queue.put((page, companies))
-            time.sleep(1)  # Minimal delay between requests
+            self._csv_writer.writerows(companies)
+            self._csv_fh.flush()
 
     def run(self):
-        self.companies_found = self.count_existing_companies()
-        logging.info(f"Starting from page {self.current_page} with {self.companies_found} companies already scraped")
-
-        while self.companies_found < self.total_companies_target:
-            batch_size = self.max_workers * 2
-            end_page = self.current_page + batch_size - 1
-
-            # Create thread pool for parallel processing
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Submit page ranges to thread pool
-                futures = []
-                for i in range(self.max_workers):
-                    start = self.current_page + (i * (batch_size // self.max_workers))
-                    end = start + (batch_size // self.max_workers) - 1
-                    if end > end_page:
-                        end = end_page
-                    futures.append(executor.submit(self.process_page_range, start, end))
-
-                # Process results as they come in
+        try:
+            self.companies_found = self.count_existing_companies()
+            logging.info(f"Starting from page {self.current_page} with {self.companies_found} companies already scraped")
+
+            while self.companies_found < self.total_companies_target:
+                batch_size = self.max_workers * 2
+
+                # One future per page; results are saved as each page completes
                 completed_pages = set()
-                while len(completed_pages) < batch_size:
-                    try:
-                        page, companies = self.results_queue.get(timeout=60)
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    futures = {
+                        executor.submit(self.scrape_page, page): page
+                        for page in range(self.current_page, self.current_page + batch_size)
+                    }
+                    for future in concurrent.futures.as_completed(futures):
+                        page = futures[future]
+                        companies = future.result()
                         if companies:
                             self.save_companies_batch(companies)
                             self.companies_found += len(companies)
                             completed_pages.add(page)
                             logging.info(f"Processed page {page}. Total companies: {self.companies_found}")
-                    except queue.Empty:
-                        break
 
-            self.current_page = max(completed_pages) + 1 if completed_pages else self.current_page + batch_size
-            self.save_progress()
+                self.current_page = max(completed_pages) + 1 if completed_pages else self.current_page + batch_size
+                self.save_progress()
 
-            if not completed_pages:
-                logging.error(f"No pages successfully processed in batch. Waiting before retry...")
-                time.sleep(60)
+                if not completed_pages:
+                    logging.error(f"No pages successfully processed in batch. Waiting before retry...")
+                    time.sleep(60)
+        finally:
+            self._csv_fh.close()
 
 if __name__ == "__main__":
     scraper = CompanyScraper(max_workers=3)  # Adjust number of workers as needed
@@ -159,4 +171,6 @@ if __name__ == "__main__":
         scraper.save_progress()
     except Exception as e:
         logging.error(f"Unexpected error: {str(e)}")
-        scraper.save_progress()
\ No newline at end of file
+        scraper.save_progress()
+    finally:
+        scraper.client.close()
\ No newline at end of file